@@ -20,33 +20,32 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 """
 
 import os
-import pyqtgraph as pg
 import numpy as np
 
 from core.connector import Connector
 from core.statusvariable import StatusVar
 from core.util import units
+from interface.science_camera_interface import ReadMode
 
 from gui.colordefs import QudiPalettePale as palette
 from gui.guibase import GUIBase
+from gui.guiutils import add_linked_axis
 from qtpy import QtCore
 from qtpy import QtWidgets
 from qtpy import uic
 
 
-class MainWindow(QtWidgets.QMainWindow):
+# The *.ui file is parsed once when this module is imported, not each time a window is created
+_Ui_MainWindow, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), 'ui_hirondelle200.ui'))
+
+
+class MainWindow(QtWidgets.QMainWindow, _Ui_MainWindow):
 
     def __init__(self):
         """ Create the laser scanner window.
         """
-        # Get the path to the *.ui file
-        this_dir = os.path.dirname(__file__)
-        ui_file = os.path.join(this_dir, 'ui_PLspectrum.ui')
-
-        # Load it
         super().__init__()
-        uic.loadUi(ui_file, self)
-        self.show()
+        self.setupUi(self)
 
 
 class PLspectrumGUI(GUIBase):
@@ -56,6 +55,21 @@ class PLspectrumGUI(GUIBase):
     # declare connectors
     spectrumlogic = Connector(interface='SpectrumLogic')
 
+    # Port names in the order of the port combo boxes items
+    _input_ports = ('INPUT_SIDE', 'INPUT_FRONT')
+    _output_ports = ('OUTPUT_SIDE', 'OUTPUT_FRONT')
+
+    # Settings widgets : (logic property name, widget name, values of the combo box items or None,
+    #                     (scale of the displayed unit in SI, unit suffix) of the spin boxes or None)
+    _settings_bindings = (('grating_index', 'gratingNumCombo', None, None),
+                          ('center_wavelength', 'wavelengthDSpin', None, (1e-9, ' nm')),
+                          ('input_port', 'inputPortCombo', _input_ports, None),
+                          ('input_slit_width', 'inputSlitWidthDSpin', None, (1e-6, ' µm')),
+                          ('output_port', 'outputPortCombo', _output_ports, None),
+                          ('output_slit_width', 'outputSlitWidthDSpin', None, (1e-6, ' µm')))
+
+    _sigApplySettings = QtCore.Signal(dict)
+
     def __init__(self, config, **kwargs):
         super().__init__(config=config, **kwargs)
 
@@ -78,18 +92,10 @@ class PLspectrumGUI(GUIBase):
         self._spec_item = self._spec.plotItem
         self._img_item = self._img.ImageItem
 
-        # create a new ViewBox, link the right axis to its coordinate system
-        self._right_axis = pg.ViewBox() # Create a ViewBox right axis
-        self._spec_item.showAxis('right') # Show the right axis of plotItem
-        self._spec_item.scene().addItem(self._right_axis) # associate the ViewBox right axis to the plotItem
-        self._spec_item.getAxis('right').linkToView(self._right_axis) # link this right axis to the ViewBox
+        # create new ViewBoxes, link the right and top axis to their coordinate system
+        self._right_axis = add_linked_axis(self._spec_item, 'right')
         self._right_axis.setXLink(self._spec_item) # link the ViewBox object to the plotItem x axis
-
-        # create a new ViewBox, link the top axis to its coordinate system (same procedure)
-        self._top_axis = pg.ViewBox()
-        self._spec_item.showAxis('top')
-        self._spec_item.scene().addItem(self._top_axis)
-        self._spec_item.getAxis('top').linkToView(self._top_axis)
+        self._top_axis = add_linked_axis(self._spec_item, 'top')
         self._top_axis.setYLink(self._spec_item)
         self._top_axis.invertX(b=True) # We force the x axis to be rightward
 
@@ -104,14 +110,45 @@ class PLspectrumGUI(GUIBase):
         self._curve1 = self._spec.plot()
         self._curve1.setPen(palette.c1, width=2)
 
+        # Only draw what is visible, with at most a few points per screen pixel
+        self._spec.setDownsampling(auto=True, mode='peak')
+        self._spec.setClipToView(True)
+
         # Connect signals :
         # Action (spectro):
         self._mw.actionRun.triggered.connect(self.run_spectrum_acquisition)
         self._mw.actionStop_Run.triggered.connect(self.stop_spectrum_acquisition)
+        self._spectrum_logic.sigSpectrumReady.connect(self._on_spectrum_ready, QtCore.Qt.QueuedConnection)
+        self._acquiring_image = False
+        self._spectrum_read_mode = None  # Read mode to restore for spectra after an image acquisition
+        # The settings are applied in the logic thread, so the window is not frozen while the grating moves
+        self._sigApplySettings.connect(self._spectrum_logic.apply_settings, QtCore.Qt.QueuedConnection)
+        self._spectrum_logic.sigSettingsApplied.connect(self._on_settings_applied, QtCore.Qt.QueuedConnection)
+        self._start_after_settings = False
         # Button (image):
-        #self._mw.runImageButton.clicked.connect(self.run_image_acquisition())
-        #self._mw.stopImageButton.clicked.connect(self.stop_image_acquisition())
-
+        self._mw.runImageButton.clicked.connect(self.run_image_acquisition)
+        self._mw.stopImageButton.clicked.connect(self.stop_spectrum_acquisition)
+
+        # The spin boxes display the SI values of the logic in their own unit, up to the hardware limits
+        constraints = self._spectrum_logic.spectro_constraints
+        maximum_slit_width = max((port.constraints.max for port in constraints.ports if port.is_motorized), default=0)
+        maxima = {'center_wavelength': max((grating.wavelength_max for grating in constraints.gratings), default=0),
+                  'input_slit_width': maximum_slit_width,
+                  'output_slit_width': maximum_slit_width}
+
+        # The widget accessors are looked up once here instead of at each settings update
+        self._settings_widgets = list()
+        for name, widget_name, values, unit in self._settings_bindings:
+            widget = getattr(self._mw, widget_name)
+            if isinstance(widget, QtWidgets.QComboBox):
+                self._settings_widgets.append((name, widget.currentIndex, widget.setCurrentIndex, values, None))
+            else:
+                scale, suffix = unit
+                widget.setSuffix(suffix)
+                widget.setDecimals(2)
+                widget.setRange(0, maxima[name] / scale)
+                self._settings_widgets.append((name, widget.value, widget.setValue, values, scale))
+        self._last_settings = {}
         self.read_settings()
 
         self.show()
@@ -119,79 +156,86 @@ class PLspectrumGUI(GUIBase):
         self._save_PNG = True
 
     def read_settings(self):
-"""
-        # Initialize widgets slots :
-        self._mw.gratingNumCombo.setCurrentIndex(self._spectrum_logic.grating)
-        self._mw.inputPortCombo.setCurrentIndex(self._spectrum_logic.input_port)
-        self._mw.outputPortCombo.setCurrentIndex(self._spectrum_logic.output_port)
-        self._mw.readModeCombo.setCurrentIndex(self._spectrum_logic.read_mode)
-        self._mw.acquModeCombo.setCurrentIndex(self._spectrum_logic.acquisition_mode)
-        self._mw.triggerModeCombo.setCurrentIndex(self._spectrum_logic.trigger_mode)
-        self._mw.scanFreqCombo.setCurrentIndex(self._spectrum_logic.
-        self._mw.accumulationDelayDSpin.setCurrentIndex(self._spectrum_logic.
-
-        self._mw.cameraGainSpin.setValue(self._spectrum_logic._camera_gain)
-        self._mw.numAccumulatedSpin.setValue(self._spectrum_logic.
-        self._mw.numTrackSpin.setValue(self._spectrum_logic.
-        self._mw.trackHeightSpin.setValue(self._spectrum_logic.
-        self._mw.trackOffsetSpin.setValue(self._spectrum_logic.
-        self._mw.gratingOffsetSpin.setValue(self._spectrum_logic.
-
-        self._mw.exposureDSpin.setValue(self._spectrum_logic.
-        self._mw.numScanDSpin.setValue(self._spectrum_logic.
-        self._mw.temperatureDSpin.setValue(self._spectrum_logic.
-        self._mw.inputSlitWidthDSpin.setValue(self._spectrum_logic.
-        self._mw.outputSlitWidthDSpin.setValue(self._spectrum_logic.
-        self._mw.wavelengthDSpin.setValue(self._spectrum_logic.
-
-        self._mw.coolerButton
-
-        self._mw.wavelengthDSpin.setRange(self._spectrum_logic.wavelength_limit)
+        """ Update the settings widgets with the current logic values and store them as the last applied settings.
+        """
+        for name, _, setter, values, scale in self._settings_widgets:
+            value = getattr(self._spectrum_logic, name)
+            if value is None:
+                continue
+            if values:
+                value = values.index(value)
+            elif scale:
+                value = value / scale
+            setter(value)
+
+        self._last_settings = self._get_settings()
+
+    def _get_settings(self):
+        """ Return the spectrometer settings currently displayed in the widgets
+
+        @return (dict): settings with the logic property names as keys
         """
+        settings = dict()
+        for name, getter, _, values, scale in self._settings_widgets:
+            value = getter()
+            if values:
+                value = values[value]
+            elif scale:
+                value = value * scale
+            settings[name] = value
+        return settings
 
     def update_settings(self):
+        """ Send the settings modified by the user to the logic in a single call.
 
-        self._spectrum_logic.center_wavelength = self._mw.wavelengthDSpin.value()
-        self._spectrum_logic.detector_offset = self._mw.detectorOffsetSpin.value()
-        self._spectrum_logic.grating = self._mw.gratingNumCombo.currentIndex()
-        self._spectrum_logic.input_slit = self._mw.inputSlitCombo.currentIndex()
-        self._spectrum_logic.input_slit_width = self._mw.inputSlitWidthDSpin.value()
-        self._spectrum_logic.output_slit = self._mw.outputSlitCombo.currentIndex()
-        self._spectrum_logic.output_slit_width = self._mw.outputSlitWidthDSpin.value()
-
-        self._mw.wavelengthDSpin.setRange(self._spectrum_logic.wavelength_limits)
-
-        self._mw.gratingNumCombo.setCurrentIndex(self._spectrum_logic.grating)
-        self._mw.inputPortCombo.setCurrentIndex(self._spectrum_logic.input_port)
-        self._mw.outputPortCombo.setCurrentIndex(self._spectrum_logic.output_port)
-        self._mw.readModeCombo.setCurrentIndex(self._spectrum_logic.read_mode)
-        self._mw.acquModeCombo.setCurrentIndex(self._spectrum_logic.acquisition_mode)
-        self._mw.triggerModeCombo.setCurrentIndex(self._spectrum_logic.trigger_mode)
-        self._mw.scanFreqCombo.setCurrentIndex(self._spectrum_logic.
-        self._mw.accumulationDelayDSpin.setCurrentIndex(self._spectrum_logic.
-
-        self._mw.cameraGainSpin.setValue(self._spectrum_logic._camera_gain)
-        self._mw.numAccumulatedSpin.setValue(self._spectrum_logic.
-        self._mw.numTrackSpin.setValue(self._spectrum_logic.
-        self._mw.trackHeightSpin.setValue(self._spectrum_logic.
-        self._mw.trackOffsetSpin.setValue(self._spectrum_logic.
-        self._mw.gratingOffsetSpin.setValue(self._spectrum_logic.
-
-        self._mw.exposureDSpin.setValue(self._spectrum_logic.
-        self._mw.numScanDSpin.setValue(self._spectrum_logic.
-        self._mw.temperatureDSpin.setValue(self._spectrum_logic.
-        self._mw.inputSlitWidthDSpin.setValue(self._spectrum_logic.
-        self._mw.outputSlitWidthDSpin.setValue(self._spectrum_logic.
-        self._mw.wavelengthDSpin.setValue(self._spectrum_logic.
-
-        self._mw.coolerButton
-
-        self._mw.wavelengthDSpin.setRange(self._spectrum_logic.wavelength_limit)
+        @return (bool): True if settings have been sent, the widgets are then updated by _on_settings_applied
+
+        Only the settings that changed since the last update are sent, so the hardware is not solicited for nothing.
+        """
+        settings = self._get_settings()
+        changed_settings = {key: value for key, value in settings.items() if self._last_settings.get(key) != value}
+        if not changed_settings:
+            return False
+        self._sigApplySettings.emit(changed_settings)
+        return True
+
+    def _on_settings_applied(self, success):
+        """ Update the widgets once the logic has applied the settings and start the acquisition waiting for them
+
+        @param (bool) success: False if a setting could not be applied, the acquisition is then not started
+        """
+        self.read_settings()
+        if self._start_after_settings:
+            self._start_after_settings = False
+            if success:
+                self._start_acquisition()
+            else:
+                self._set_run_controls_enabled(True)
+
+    def _set_run_controls_enabled(self, enabled):
+        """ Enable or disable together the controls starting an acquisition
+
+        @param (bool) enabled: True to enable the controls
+        """
+        self._mw.actionRun.setEnabled(enabled)
+        self._mw.runImageButton.setEnabled(enabled)
+
+    def _start_acquisition(self):
+        """ Start the logic acquisition, the run controls are enabled again if it has been refused
+
+        The logic locks its module state before returning when the acquisition starts.
+        """
+        self._spectrum_logic.start_acquisition()
+        if self._spectrum_logic.module_state() != 'locked':
+            self._set_run_controls_enabled(True)
 
     def on_deactivate(self):
         """ Deinitialisation performed during deactivation of the module.
         """
-
+        self._spectrum_logic.sigSpectrumReady.disconnect(self._on_spectrum_ready)
+        self._spectrum_logic.sigSettingsApplied.disconnect(self._on_settings_applied)
+        self._sigApplySettings.disconnect()
+        self._settings_widgets = list()
         self._mw.close()
 
     def show(self):
@@ -202,14 +246,22 @@ class PLspectrumGUI(GUIBase):
         self._mw.raise_()
 
     def run_spectrum_acquisition(self):
-        """Run the spectrum acquisition called from actionRun
-        and plot the spectrum data obtained.
+        """Run the spectrum acquisition called from actionRun.
+
+        The acquisition runs in the logic thread, the spectrum is plotted by _on_spectrum_ready when it is finished.
         """
-        self.update_settings()
-        self._spectrum_logic.start_acquisition()
-        data = self._spectrum_logic.spectrum_data
-        wavelength = np.linspace(0, 1, len(data))
-        self._curve1.setData(wavelength, data[:, 0])
+        if self._spectrum_logic.module_state() == 'locked':
+            self.log.warning('An acquisition is already running.')
+            return
+        self._acquiring_image = False
+        if self._spectrum_read_mode is not None:
+            self._spectrum_logic.read_mode = self._spectrum_read_mode
+            self._spectrum_read_mode = None
+        self._set_run_controls_enabled(False)
+        if self.update_settings():
+            self._start_after_settings = True
+        else:
+            self._start_acquisition()
 
     def stop_spectrum_acquisition(self):
         """Stop the spectrum acquisition called from actionStop_Run
@@ -217,11 +269,64 @@ class PLspectrumGUI(GUIBase):
         self._spectrum_logic.stop_acquisition()
 
     def run_image_acquisition(self):
-        """Run the image acquisition called from runImageButton
-        and plot the spectrum data obtained.
+        """Run the image acquisition called from runImageButton.
+
+        The image is plotted by _on_spectrum_ready when the acquisition is finished.
         """
-        self._spectrum_logic.set_read_mode('IMAGE')
-        self._spectrum_logic.start_acquisition()
-        data = self._spectrum_logic._spectrum_data
-        self._img_item.setImage(data)
+        if self._spectrum_logic.module_state() == 'locked':
+            self.log.warning('An acquisition is already running.')
+            return
+        read_mode = self._get_read_mode()
+        if read_mode not in ('IMAGE', 'IMAGE_ADVANCED'):
+            self._spectrum_read_mode = read_mode
+        self._spectrum_logic.read_mode = 'IMAGE'
+        if self._get_read_mode() != 'IMAGE':  # The logic has logged why the read mode could not be set
+            return
+        self._acquiring_image = True
+        self._set_run_controls_enabled(False)
+        self._start_acquisition()
+
+    def _get_read_mode(self):
+        """ Return the name of the read mode currently used by the logic
+
+        @return (str): read mode name, as 'FVB' or 'IMAGE'
+        """
+        read_mode = self._spectrum_logic.read_mode
+        return read_mode.name if isinstance(read_mode, ReadMode) else read_mode
 
+    def _get_spectrum(self, data):
+        """ Return the spectrum to plot from the data of a single scan, depending on the read mode
+
+        @param (ndarray) data: The data of a single scan, 1d for 'FVB', one row per track or an image otherwise
+
+        @return (ndarray): A contiguous float32 array, plotted without being copied again by pyqtgraph
+        """
+        read_mode = self._get_read_mode()
+        if read_mode == 'MULTIPLE_TRACKS':
+            data = data[0]  # The first track is plotted
+        elif read_mode in ('IMAGE', 'IMAGE_ADVANCED'):
+            # Vertical binning : the image is (height, width), summed along the height directly in float32
+            return np.sum(data, axis=0, dtype=np.float32)
+        return np.ascontiguousarray(data, dtype=np.float32)
+
+    def _on_spectrum_ready(self, data):
+        """ Plot the data acquired by the logic
+
+        @param (ndarray|list) data: The acquired spectrum or image, or the list of them for multiple scans
+        """
+        self._set_run_controls_enabled(True)
+        if isinstance(data, list):  # Multiple scans : the last scan is plotted
+            if len(data) == 0:
+                return
+            data = data[-1]
+        if self._acquiring_image:
+            self._img_item.setImage(data)
+        spectrum = self._get_spectrum(data)
+        # The logic only computes the wavelength axis again when the spectrometer settings change
+        wavelength_spectrum = self._spectrum_logic.wavelength_spectrum
+        if spectrum.size != wavelength_spectrum.size:
+            # 'IMAGE_ADVANCED' data of a sub-area or with horizontal binning has no wavelength axis
+            self.log.warning('The acquired spectrum has {} points but the wavelength axis has {}, it is not plotted.'
+                             .format(spectrum.size, wavelength_spectrum.size))
+            return
+        self._curve1.setData(x=wavelength_spectrum, y=spectrum, connect='all')
@@ -19,31 +19,44 @@ Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
 top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
 """
 
+import math
 import os
 
-from core.configoption import ConfigOption
 from core.connector import Connector
-from core.util.units import ScaledFloat
 from gui.guibase import GUIBase
 from qtpy import QtWidgets
 from qtpy.QtWidgets import QLabel
 from qtpy import QtCore
 from qtpy import uic
 
-class DisplayMainWindow(QtWidgets.QMainWindow):
+_PREFIXES = 'yzafpnµm kMGTPEZY'
+
+
+def _format_scaled(value, unit):
+    """ Format a value with its SI prefix and two decimals, like '{:.2r}{}'.format(ScaledFloat(value), unit)
+
+    This function is called for every refreshed value, so it does the prefix lookup directly instead of building a
+    ScaledFloat object. Non finite values are displayed without prefix.
+    """
+    if value == 0 or not math.isfinite(value):
+        exponent = 0
+    else:
+        exponent = min(max(math.floor(math.log10(abs(value)) / 3), -8), 8)
+    return '{:.2f} {}{}'.format(value / 1000 ** exponent, _PREFIXES[8 + exponent].strip(), unit)
+
+
+# The *.ui file is parsed once when this module is imported, not each time a window is created
+_Ui_DisplayMainWindow, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), 'ui_displaygui.ui'))
+
+
+class DisplayMainWindow(QtWidgets.QMainWindow, _Ui_DisplayMainWindow):
     """ Helper class for window loaded from UI file.
     """
     def __init__(self):
         """ Create the switch GUI window.
         """
-        # Get the path to the *.ui file
-        this_dir = os.path.dirname(__file__)
-        ui_file = os.path.join(this_dir, 'ui_displaygui.ui')
-
-        # Load it
         super().__init__()
-        uic.loadUi(ui_file, self)
-        self.show()
+        self.setupUi(self)
 
 class DisplayGui(GUIBase):
     """ A grephical interface to mofe switches by hand and change their calibration.
@@ -56,7 +69,6 @@ class DisplayGui(GUIBase):
 
     # declare connectors
     displaylogic = Connector(interface='DisplayLogic')
-    _refreshing_time = ConfigOption('refreshing_time', 1000)
 
     def on_activate(self):
         """Create all UI objects and show the window.
@@ -64,22 +76,18 @@ class DisplayGui(GUIBase):
         self._displaylogic = self.displaylogic()
         self._mw = DisplayMainWindow()
 
-        # For each switch that the logic has, add a widget to the GUI to show its state
-        self._hw = []
-        self._values = []
-        i = 0
-        for label, displayer in self._displaylogic.display.items():
+        # For each process that the logic has, add a widget to the GUI to show its value
+        # The values are filled by the logic refresh, the hardware is not accessed from the GUI thread
+        self._values = dict()
+        self._texts = dict()
+        for i, label in enumerate(self._displaylogic.display):
             self._mw.layout.addWidget(QLabel('{} :'.format(label)), i, 0)
-            self._hw.append(displayer)
-            self._values.append(QLabel(str('{:.2r}{}'.format(ScaledFloat(self._hw[i].get_process_value()),
-                                                         self._hw[i].get_process_unit()[0]))))
-            self._mw.layout.addWidget(self._values[i], i, 1)
-            i += 1
+            self._texts[label] = ''
+            self._values[label] = QLabel(self._texts[label])
+            self._mw.layout.addWidget(self._values[label], i, 1)
 
-        self.updateValues = QtCore.QTimer()
-        self.updateValues.setSingleShot(False)
-        self.updateValues.timeout.connect(self.update_values)
-        self.updateValues.start(self._refreshing_time)
+        self._displaylogic.sigValueChanged.connect(self._on_value_changed, QtCore.Qt.QueuedConnection)
+        self._displaylogic.request_values()
 
         self.show()
 
@@ -91,12 +99,19 @@ class DisplayGui(GUIBase):
     def on_deactivate(self):
         """ Hide window and stop ipython console.
         """
+        self._displaylogic.sigValueChanged.disconnect(self._on_value_changed)
         self.saveWindowPos(self._mw)
         self._mw.close()
 
-    def update_values(self):
-
-        for i in range(len(self._hw)):
-            self._values[i].setText(str('{:.2r}{}'.format(ScaledFloat(self._hw[i].get_process_value()),
-                                                         self._hw[i].get_process_unit()[0])))
+    def _on_value_changed(self, label, value, unit):
+        """ Update the widget of a process whose value changed
 
+        @param (str) label: The label of the process
+        @param (float) value: The new value
+        @param (str) unit: The unit of the value
+        """
+        text = _format_scaled(value, unit)
+        # Setting the same text would still trigger a repaint of the label
+        if text != self._texts[label]:
+            self._texts[label] = text
+            self._values[label].setText(text)
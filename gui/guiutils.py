@@ -107,3 +107,17 @@ class ColorBar(pg.GraphicsObject):
         """
         return pg.QtCore.QRectF(self.pic.boundingRect())
 
+
+def add_linked_axis(plot_item, side):
+    """ Show an additional axis of a plot item and link it to a new ViewBox.
+
+    @param object plot_item: pyqtgraph.PlotItem the axis belongs to
+    @param str side: the axis to show, 'right' or 'top'
+
+    @return object: pyqtgraph.ViewBox giving the coordinate system of the axis
+    """
+    view_box = pg.ViewBox()
+    plot_item.showAxis(side)
+    plot_item.scene().addItem(view_box)
+    plot_item.getAxis(side).linkToView(view_box)
+    return view_box
@@ -20,13 +20,13 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 """
 
 import os
-import pyqtgraph as pg
 import numpy as np
 
 from core.connector import Connector
 from core.util import units
 from gui.colordefs import QudiPalettePale as palette
 from gui.guibase import GUIBase
+from gui.guiutils import add_linked_axis
 from gui.fitsettings import FitSettingsDialog, FitSettingsComboBox
 from qtpy import QtCore
 from qtpy import QtWidgets
@@ -75,18 +75,10 @@ class SpectrometerGui(GUIBase):
         self._pw = self._mw.plotWidget  # pg.PlotWidget(name='Counter1')
         self._plot_item = self._pw.plotItem
 
-        # create a new ViewBox, link the right axis to its coordinate system
-        self._right_axis = pg.ViewBox()
-        self._plot_item.showAxis('right')
-        self._plot_item.scene().addItem(self._right_axis)
-        self._plot_item.getAxis('right').linkToView(self._right_axis)
+        # create new ViewBoxes, link the right and top axis to their coordinate system
+        self._right_axis = add_linked_axis(self._plot_item, 'right')
         self._right_axis.setXLink(self._plot_item)
-
-        # create a new ViewBox, link the right axis to its coordinate system
-        self._top_axis = pg.ViewBox()
-        self._plot_item.showAxis('top')
-        self._plot_item.scene().addItem(self._top_axis)
-        self._plot_item.getAxis('top').linkToView(self._top_axis)
+        self._top_axis = add_linked_axis(self._plot_item, 'top')
         self._top_axis.setYLink(self._plot_item)
         self._top_axis.invertX(b=True)
 
@@ -305,16 +305,17 @@ class Main(Base, ScienceCameraInterface):
             width = int((params.horizontal_end - params.horizontal_start+1)/params.horizontal_binning)
 
         dimension = int(width * height)
-        c_image_array = ct.c_int32 * dimension
-        c_image = c_image_array()
-        status_code = self._dll.GetAcquiredData(ct.pointer(c_image), dimension)
+        # The DLL writes directly in the numpy array memory, no intermediate ctypes array is copied
+        # The array is zeroed so that a failed read does not return uninitialised memory as data
+        image = np.zeros(dimension, dtype=np.int32)
+        status_code = self._dll.GetAcquiredData(image.ctypes.data_as(ct.POINTER(ct.c_int32)), dimension)
         if status_code != OK_CODE:
             self.log.error('Could not retrieve data from camera. {0}'.format(ERROR_DICT[status_code]))
 
         if self.get_read_mode() == ReadMode.FVB:
-            return np.array(c_image)
+            return image
         else:
-            return np.reshape(np.array(c_image), (height, width))
+            return np.reshape(image, (height, width))
 
     ##############################################################################
     #                           Read mode functions
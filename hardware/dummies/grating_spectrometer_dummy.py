@@ -44,6 +44,8 @@ class Main(Base, GratingSpectrometerInterface):
         self._dll = None
         self._shutter_status = None
         self._device_id = None
+        self._dispersion_key = None
+        self._dispersion = None
 
     ##############################################################################
     #                            Basic functions
@@ -79,19 +81,19 @@ class Main(Base, GratingSpectrometerInterface):
         number_of_gratings = 3
 
         grating = Grating()
-        grating.ruling = 150e-3
+        grating.ruling = 150e3  # Lines per meter
         grating.blaze = 600e-9
         grating.wavelength_max = 1500e-9
         constraints.gratings.append(grating)
 
         grating = Grating()
-        grating.ruling = 300e-3
+        grating.ruling = 300e3
         grating.blaze = 700e-9
         grating.wavelength_max = 1600e-9
         constraints.gratings.append(grating)
 
         grating = Grating()
-        grating.ruling = 600e-3
+        grating.ruling = 600e3
         grating.blaze = 500e-9
         grating.wavelength_max = 1200e-9
         constraints.gratings.append(grating)
@@ -161,6 +163,26 @@ class Main(Base, GratingSpectrometerInterface):
         else:
             self.log.error('The wavelength {} nm is not in the range {} nm , {} nm'.format(value*1e9, 0, maxi*1e9))
 
+    def get_spectrometer_dispersion(self, number_pixels, pixel_width):
+        """ Returns a simulated wavelength calibration of each pixel
+
+        @param (int) number_pixels: number of pixels of the camera
+        @param (float) pixel_width: width of a pixel (meter)
+
+        @return (ndarray): wavelength of each pixel (meter)
+
+        The array is computed again only when the grating, the center wavelength or the camera parameters change.
+        It is returned read-only, so it can be shared between the calls.
+        """
+        key = (self._grating_index, self._center_wavelength, number_pixels, pixel_width)
+        if key != self._dispersion_key:
+            grating = self._constraints.gratings[self._grating_index]
+            step = pixel_width / (grating.ruling * self._constraints.focal_length)  # Linear dispersion (meter/pixel)
+            dispersion = self._center_wavelength + (np.arange(number_pixels) - number_pixels / 2) * step
+            dispersion.setflags(write=False)
+            self._dispersion_key, self._dispersion = key, dispersion
+        return self._dispersion
+
     def get_input_port(self):
         """ Returns the current input port
 
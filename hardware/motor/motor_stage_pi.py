@@ -23,8 +23,6 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 import visa
 import time
 
-from collections import OrderedDict
-
 from core.module import Base
 from core.configoption import ConfigOption
 from interface.motor_interface import MotorInterface
@@ -110,6 +108,7 @@ class MotorStagePI(Base, MotorInterface):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self._constraints = None
 
 
     def on_activate(self):
@@ -122,6 +121,12 @@ class MotorStagePI(Base, MotorInterface):
             baud_rate=self._pi_xyz_baud_rate,
             timeout=self._pi_xyz_timeout)
 
+        # Encoded axis IDs and termination, so that a command is sent without formatting a new string at each call
+        self._axis_prefixes = {self._first_axis_label: self._first_axis_ID.encode(),
+                               self._second_axis_label: self._second_axis_ID.encode(),
+                               self._third_axis_label: self._third_axis_ID.encode()}
+        self._term_char = self._pi_xyz_term_char.encode()
+
         return 0
 
 
@@ -143,8 +148,13 @@ class MotorStagePI(Base, MotorInterface):
         movement, velocity, ...)
         Each constraint is a tuple of the form
             (min_value, max_value, stepsize)
+
+        The axes are only defined by config options, so the constraints are built once and then reused.
         """
-        constraints = OrderedDict()
+        if self._constraints is not None:
+            return self._constraints
+
+        constraints = dict()
 
         axis0 = {'label': self._first_axis_label,
                  'ID': self._first_axis_ID,
@@ -193,6 +203,7 @@ class MotorStagePI(Base, MotorInterface):
         constraints[axis1['label']] = axis1
         constraints[axis2['label']] = axis2
 
+        self._constraints = constraints
         return constraints
 
 
@@ -457,10 +468,8 @@ class MotorStagePI(Base, MotorInterface):
 
         @return error code (0:OK, -1:error)
         """
-        constraints = self.get_constraints()
         try:
-            #self.log.info(constraints[axis]['ID'] + command + '\n')
-            self._serial_connection_xyz.write(constraints[axis]['ID'] + command + '\n')
+            self._serial_connection_xyz.write_raw(self._axis_prefixes[axis] + command.encode() + self._term_char)
             trash=self._read_answer_xyz()   # deletes possible answers
             return 0
         except:
@@ -489,8 +498,7 @@ class MotorStagePI(Base, MotorInterface):
 
         @return answer string: answer of motor
         """
-        constraints = self.get_constraints()
-        self._serial_connection_xyz.write(constraints[axis]['ID']+question+'\n')
+        self._serial_connection_xyz.write_raw(self._axis_prefixes[axis] + question.encode() + self._term_char)
         answer=self._read_answer_xyz()
         return answer
 
@@ -19,25 +19,44 @@ Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
 top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
 na=not applicable
 """
+import os
+import re
+import logging
+import functools
 import numpy as np
 import ctypes as ct
 
 from core.module import Base
 from core.configoption import ConfigOption
+from core.util.mutex import Mutex
 
 from interface.grating_spectrometer_interface import GratingSpectrometerInterface
 from interface.grating_spectrometer_interface import Grating, PortType, Port, Constraints
 
-ERROR_CODE = {
-    20201: "SHAMROCK_COMMUNICATION_ERROR",
-    20202: "SHAMROCK_SUCCESS",
-    20266: "SHAMROCK_P1INVALID",
-    20267: "SHAMROCK_P2INVALID",
-    20268: "SHAMROCK_P3INVALID",
-    20269: "SHAMROCK_P4INVALID",
-    20270: "SHAMROCK_P5INVALID",
-    20275: "SHAMROCK_NOT_INITIALIZED"
-}
+# Error code definition line of the header, as '#define SHAMROCK_SUCCESS 20202'
+_ERROR_CODE_PATTERN = re.compile(r'^\s*#define\s+(SHAMROCK_\w+)\s+(\d+)')
+
+
+def _read_error_codes():
+    """ Read the error codes of the Shamrock DLL from the header file
+
+    @return (dict): The error names with the error codes as keys
+
+    This is done once when this module is imported, the file does not change at runtime.
+    The header is next to this module. If it can not be read, the codes are still logged but without their name.
+    """
+    filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'errorcodes_shamrock.h')
+    error_code = {}
+    try:
+        with open(filename) as f:
+            matches = (_ERROR_CODE_PATTERN.match(line) for line in f)
+            error_code = {int(match.group(2)): match.group(1) for match in matches if match}
+    except OSError:
+        logging.getLogger(__name__).warning('Shamrock error codes file {} could not be read.'.format(filename))
+    return error_code
+
+
+ERROR_CODE = _read_error_codes()
 
 OK_CODE = 20202  # Status code associated with DRV_SUCCESS
 
@@ -47,6 +66,65 @@ OUTPUT_CODE = 2
 FRONT_CODE = 0
 SIDE_CODE = 1
 
+# Slit index of each port as defined by Andor shamrock conventions
+SLIT_INDEX = {PortType.INPUT_FRONT: 2,
+              PortType.INPUT_SIDE: 1,
+              PortType.OUTPUT_FRONT: 4,
+              PortType.OUTPUT_SIDE: 3}
+
+# Prototypes of the DLL functions used by this module as {name: (argtypes, restype)}
+# They are declared once when the DLL is loaded so ctypes does not have to guess the argument conversion at each call.
+# ctypes then only accepts Python int and float : the setters convert their parameter (that can be a numpy scalar).
+# All the functions return an unsigned int status code, as declared in the SDK header.
+# Functions of a ct.cdll library release the GIL during the call, so the motions that block inside the DLL
+# (ShamrockSetGrating, ShamrockSetWavelength) only stall the calling thread, not the other Qudi modules.
+PROTOTYPES = {
+    'ShamrockInitialize': ([ct.c_char_p], ct.c_uint),
+    'ShamrockClose': ([], ct.c_uint),
+    'ShamrockGetNumberDevices': ([ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockGetGrating': ([ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockSetGrating': ([ct.c_int, ct.c_int], ct.c_uint),
+    'ShamrockGetWavelength': ([ct.c_int, ct.POINTER(ct.c_float)], ct.c_uint),
+    'ShamrockSetWavelength': ([ct.c_int, ct.c_float], ct.c_uint),
+    'ShamrockGetCalibration': ([ct.c_int, ct.POINTER(ct.c_float), ct.c_int], ct.c_uint),
+    'ShamrockGetFlipperMirror': ([ct.c_int, ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockSetFlipperMirror': ([ct.c_int, ct.c_int, ct.c_int], ct.c_uint),
+    'ShamrockGetAutoSlitWidth': ([ct.c_int, ct.c_int, ct.POINTER(ct.c_float)], ct.c_uint),
+    'ShamrockSetAutoSlitWidth': ([ct.c_int, ct.c_int, ct.c_float], ct.c_uint),
+    'ShamrockEepromGetOpticalParams': ([ct.c_int, ct.POINTER(ct.c_float), ct.POINTER(ct.c_float),
+                                        ct.POINTER(ct.c_float)], ct.c_uint),
+    'ShamrockGetNumberGratings': ([ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockGetGratingInfo': ([ct.c_int, ct.c_int, ct.POINTER(ct.c_float), ct.c_char_p, ct.POINTER(ct.c_int),
+                                ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockGetWavelengthLimits': ([ct.c_int, ct.c_int, ct.POINTER(ct.c_float), ct.POINTER(ct.c_float)], ct.c_uint),
+    'ShamrockFlipperMirrorIsPresent': ([ct.c_int, ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockAutoSlitIsPresent': ([ct.c_int, ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockSetNumberPixels': ([ct.c_int, ct.c_int], ct.c_uint),
+    'ShamrockGetNumberPixels': ([ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockSetPixelWidth': ([ct.c_int, ct.c_float], ct.c_uint),
+    'ShamrockGetPixelWidth': ([ct.c_int, ct.POINTER(ct.c_float)], ct.c_uint),
+    'ShamrockSetDetectorOffset': ([ct.c_int, ct.c_int], ct.c_uint),
+    'ShamrockGetDetectorOffset': ([ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockGratingIsPresent': ([ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockGetGratingOffset': ([ct.c_int, ct.c_int, ct.POINTER(ct.c_int)], ct.c_uint),
+    'ShamrockSetGratingOffset': ([ct.c_int, ct.c_int, ct.c_int], ct.c_uint),
+}
+
+
+def _memoized(method):
+    """ Decorator storing the result of a DLL wrapper returning a value fixed for the whole session
+
+    The results are stored by arguments in the _memo dictionary of the module, which is emptied when the hardware
+    configuration may have changed.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        key = (method.__name__, args)
+        if key not in self._memo:
+            self._memo[key] = method(self, *args)
+        return self._memo[key]
+    return wrapper
+
 
 class Shamrock(Base, GratingSpectrometerInterface):
     """ Hardware module that interface a Shamrock spectrometer from Andor
@@ -73,6 +151,21 @@ class Shamrock(Base, GratingSpectrometerInterface):
         self._dll = None
         self._shutter_status = None
         self._device_id = None
+        self._device = None  # Device index as a c_int, passed as is to the DLL functions
+        self._flipper_present = {'input': False, 'output': False}
+        self._memo = dict()
+        # Output scalars reused by the single value getters. This module is called from the threads of the logic, the
+        # GUI or the console, so they are only accessed under self._lock, through self._read_int and self._read_float.
+        self._int_out = ct.c_int()
+        self._float_out = ct.c_float()
+        # Pointers built once on the scalars, passed as is instead of letting ctypes take a reference at each call
+        self._int_pointer = ct.pointer(self._int_out)
+        self._float_pointer = ct.pointer(self._float_out)
+        self._lock = Mutex()  # Guards the output scalars, the calibration buffer and the detector geometry
+        self._calibration_buffer = None  # Reused by the DLL to write the calibration, reallocated if the size changes
+        self._calibration_pointer = None
+        self._detector_geometry = None  # (number of pixels, pixel width) last sent to the DLL
+        self._grating_index = None  # Last grating index read from the DLL, None when it has to be read again
 
     ##############################################################################
     #                            Basic functions
@@ -85,7 +178,14 @@ class Shamrock(Base, GratingSpectrometerInterface):
             self.log.error('Error during dll loading of the Shamrock spectrometer, check the dll path.')
             return
 
-        status_code = self._dll.ShamrockInitialize()
+        # Bind the prototyped functions once, so that self._dll.ShamrockGetWavelength is called as self._GetWavelength
+        for name, (argtypes, restype) in PROTOTYPES.items():
+            function = getattr(self._dll, name)
+            function.argtypes = argtypes
+            function.restype = restype
+            setattr(self, '_{}'.format(name[len('Shamrock'):]), function)
+
+        status_code = self._Initialize(b'')  # Empty path : the DLL looks for its initialisation file in its own folder
         if status_code != OK_CODE:
             self.log.error('Problem during Shamrock initialization')
             return
@@ -101,12 +201,19 @@ class Shamrock(Base, GratingSpectrometerInterface):
                 return
         else:
             self._device_id = 0
+        self._device = ct.c_int(self._device_id)
 
+        # The flipper mirrors are part of the hardware configuration, they are probed once for the whole session
+        self._flipper_present = {flipper: bool(self._flipper_mirror_is_present(flipper))
+                                 for flipper in ('input', 'output')}
         self._constraints = self._build_constraints()
 
     def on_deactivate(self):
         """ De-initialisation performed during deactivation of the module. """
-        return self._dll.ShamrockClose()
+        self._memo = dict()
+        self._detector_geometry = None
+        self._grating_index = None
+        return self._Close()
 
     def _build_constraints(self):
         """ Internal method that build the constraints once at initialisation
@@ -131,21 +238,21 @@ class Shamrock(Base, GratingSpectrometerInterface):
 
         # Add the ports one by one
         input_port_front = Port(PortType.INPUT_FRONT)
-        input_port_front.is_motorized = self._auto_slit_is_present('input', 'front')
+        input_port_front.is_motorized = self._auto_slit_is_present(PortType.INPUT_FRONT)
         constraints.ports.append(input_port_front)
 
-        if self._flipper_mirror_is_present('input'):
+        if self._flipper_present['input']:
             input_port_side = Port(PortType.INPUT_SIDE)
-            input_port_side.is_motorized = self._auto_slit_is_present('input', 'side')
+            input_port_side.is_motorized = self._auto_slit_is_present(PortType.INPUT_SIDE)
             constraints.ports.append(input_port_side)
 
         output_port_front = Port(PortType.OUTPUT_FRONT)
-        output_port_front.is_motorized = self._auto_slit_is_present('output', 'front')
+        output_port_front.is_motorized = self._auto_slit_is_present(PortType.OUTPUT_FRONT)
         constraints.ports.append(output_port_front)
 
-        if self._flipper_mirror_is_present('output'):
+        if self._flipper_present['output']:
             output_port_side = Port(PortType.OUTPUT_SIDE)
-            output_port_side.is_motorized = self._auto_slit_is_present('output', 'side')
+            output_port_side.is_motorized = self._auto_slit_is_present(PortType.OUTPUT_SIDE)
             constraints.ports.append(output_port_side)
 
         for port in constraints.ports:
@@ -164,9 +271,34 @@ class Shamrock(Base, GratingSpectrometerInterface):
 
         @return (int): The code given in parameter is returned """
         if status_code != OK_CODE:
-            self.log.error('Error in Shamrock with error code {}: {}'.format(status_code, ERROR_CODE[status_code]))
+            self.log.error('Error in Shamrock with error code {}: {}'.format(
+                status_code, ERROR_CODE.get(status_code, 'UNKNOWN_ERROR')))
         return status_code
 
+    def _read_int(self, function, *args):
+        """ Call a DLL getter writing a single int in the shared output scalar
+
+        @param (function) function: The bound DLL function, called with the device, args and the output pointer
+        @param args: The parameters given to the function between the device and the output pointer
+
+        @return (tuple(int, int)): The status code and the value written by the DLL
+        """
+        with self._lock:
+            status_code = function(self._device, *args, self._int_pointer)
+            return status_code, self._int_out.value
+
+    def _read_float(self, function, *args):
+        """ Call a DLL getter writing a single float in the shared output scalar
+
+        @param (function) function: The bound DLL function, called with the device, args and the output pointer
+        @param args: The parameters given to the function between the device and the output pointer
+
+        @return (tuple(int, float)): The status code and the value written by the DLL
+        """
+        with self._lock:
+            status_code = function(self._device, *args, self._float_pointer)
+            return status_code, self._float_out.value
+
     ##############################################################################
     #                            Interface functions
     ##############################################################################
@@ -182,13 +314,16 @@ class Shamrock(Base, GratingSpectrometerInterface):
     def get_grating_index(self):
         """ Returns the current grating index
 
-        @return (int): Current grating index
+        @return (int): Current grating index, the last one read (or None) if the DLL call fails
 
         Tested
         """
-        grating = ct.c_int()
-        self._check(self._dll.ShamrockGetGrating(self._device_id, ct.byref(grating)))
-        return grating.value-1  # DLL starts at 1
+        status_code, value = self._read_int(self._GetGrating)
+        if status_code != OK_CODE:  # Polled getters : the success path skips the self._check call
+            self._check(status_code)
+            return self._grating_index
+        self._grating_index = value-1  # DLL starts at 1, only a successful read is kept
+        return self._grating_index
 
     def set_grating_index(self, value):
         """ Sets the grating by index
@@ -197,18 +332,21 @@ class Shamrock(Base, GratingSpectrometerInterface):
 
         Tested
         """
-        self._check(self._dll.ShamrockSetGrating(self._device_id, value+1))  # DLL starts at 1
+        self._grating_index = None  # Read back on next use, in case the motion failed
+        self._check(self._SetGrating(self._device, int(value)+1))  # DLL starts at 1
 
     def get_wavelength(self):
         """ Returns the current central wavelength in meter
 
-        @return (float): current central wavelength (meter)
+        @return (float): current central wavelength (meter), None if the DLL call fails
 
         Tested - si
         """
-        wavelength = ct.c_float()
-        self._check(self._dll.ShamrockGetWavelength(self._device_id, ct.byref(wavelength)))
-        return wavelength.value * 1e-9
+        status_code, value = self._read_float(self._GetWavelength)
+        if status_code != OK_CODE:
+            self._check(status_code)
+            return None
+        return value * 1e-9
 
     def set_wavelength(self, value):
         """ Sets the new central wavelength in meter
@@ -217,10 +355,13 @@ class Shamrock(Base, GratingSpectrometerInterface):
 
         Tested - si - go to 0 order
         """
-        maxi = self.get_constraints().gratings[self._device_id].wavelength_max
+        grating_index = self._grating_index if self._grating_index is not None else self.get_grating_index()
+        if grating_index is None:
+            self.log.error('The wavelength can not be set, the current grating is unknown.')
+            return
+        maxi = self.get_constraints().gratings[grating_index].wavelength_max
         if 0 <= value <= maxi:
-            self._dll.ShamrockSetWavelength.argtypes = [ct.c_int32, ct.c_float]
-            self._check(self._dll.ShamrockSetWavelength(self._device_id, value * 1e9))
+            self._check(self._SetWavelength(self._device, float(value) * 1e9))
         else:
             self.log.error('The wavelength {} is not in the range {}, {}'.format(value*1e9, 0, maxi*1e9))
 
@@ -230,24 +371,32 @@ class Shamrock(Base, GratingSpectrometerInterface):
         Shamrock DLL can give an estimation of the calibration if the required parameters are given.
         This feature is not used by Qudi but is useful to check everything is ok.
 
+        @param (int) number_pixels: number of pixels of the camera
+        @param (float) pixel_width: width of a pixel (meter)
+
+        @return (np.ndarray): wavelength of each pixel (meter), the whole array is given by a single DLL call
+
+        The detector geometry is only sent to the DLL when it differs from the previous call.
         """
-        self._set_number_of_pixels(number_pixels)
-        self._set_pixel_width(pixel_width)
-        wl_array = np.ones((number_pixels,), dtype=np.float32)
-        self._dll.ShamrockGetCalibration.argtypes = [ct.c_int32, ct.c_void_p, ct.c_int32]
-        self._check(self._dll.ShamrockGetCalibration(self._device_id, wl_array.ctypes.data, number_pixels))
-        return wl_array*1e-9  # DLL uses nanometer
+        with self._lock:
+            if (number_pixels, pixel_width) != self._detector_geometry:
+                self._set_number_of_pixels(number_pixels)
+                self._set_pixel_width(pixel_width)
+                self._detector_geometry = (number_pixels, pixel_width)
+            return self._get_calibration(number_pixels)*1e-9  # DLL uses nanometer, a new array is returned
 
     def get_input_port(self):
         """ Returns the current input port
 
-        @return (PortType): current port side
+        @return (PortType): current port side, None if the DLL call fails
 
         Tested
         """
-        input_port = ct.c_int()
-        self._dll.ShamrockGetFlipperMirror(self._device_id, INPUT_CODE, ct.byref(input_port))
-        return PortType.INPUT_FRONT if input_port.value == FRONT_CODE else PortType.INPUT_SIDE
+        status_code, value = self._read_int(self._GetFlipperMirror, INPUT_CODE)
+        if status_code != OK_CODE:
+            self._check(status_code)
+            return None
+        return PortType.INPUT_FRONT if value == FRONT_CODE else PortType.INPUT_SIDE
 
     def set_input_port(self, value):
         """ Set the current input port
@@ -262,22 +411,24 @@ class Shamrock(Base, GratingSpectrometerInterface):
         if value in [PortType.OUTPUT_FRONT, PortType.OUTPUT_SIDE]:
             self.log.error('Function parameter must be an INPUT value of PortType ')
             return
-        if not self._flipper_mirror_is_present('input'):
+        if not self._flipper_present['input']:
             self.log.debug('No flipper mirror is present on the input port : PortType.INPUT_SIDE value is forbidden ')
             return
         code = FRONT_CODE if value == PortType.INPUT_FRONT else SIDE_CODE
-        self._check(self._dll.ShamrockSetFlipperMirror(self._device_id, INPUT_CODE, code))
+        self._check(self._SetFlipperMirror(self._device, INPUT_CODE, code))
 
     def get_output_port(self):
         """ Returns the current output port
 
-        @return (PortType): current port side
+        @return (PortType): current port side, None if the DLL call fails
 
         Tested
         """
-        output_port = ct.c_int()
-        self._dll.ShamrockGetFlipperMirror(self._device_id, OUTPUT_CODE, ct.byref(output_port))
-        return PortType.OUTPUT_FRONT if output_port.value == FRONT_CODE else PortType.OUTPUT_SIDE
+        status_code, value = self._read_int(self._GetFlipperMirror, OUTPUT_CODE)
+        if status_code != OK_CODE:
+            self._check(status_code)
+            return None
+        return PortType.OUTPUT_FRONT if value == FRONT_CODE else PortType.OUTPUT_SIDE
 
     def set_output_port(self, value):
         """ Set the current output port
@@ -292,32 +443,34 @@ class Shamrock(Base, GratingSpectrometerInterface):
         if value in [PortType.INPUT_FRONT, PortType.INPUT_SIDE]:
             self.log.error('Function parameter must be an OUTPUT value of PortType ')
             return
-        if not self._flipper_mirror_is_present('output'):
+        if not self._flipper_present['output']:
             self.log.debug('No flipper mirror is present on the input port : PortType.OUTPUT_SIDE value is forbidden ')
             return
         code = FRONT_CODE if value == PortType.OUTPUT_FRONT else SIDE_CODE
-        self._check(self._dll.ShamrockSetFlipperMirror(self._device_id, OUTPUT_CODE, code))
+        self._check(self._SetFlipperMirror(self._device, OUTPUT_CODE, code))
 
     def get_slit_width(self, port_type):
         """ Getter for the current slit width in meter on a given port
 
         @param (PortType) port_type: The port to inquire
 
-        @return (float): input slit width (in meter)
+        @return (float): input slit width (in meter), None if the DLL call fails
         """
         if not port_type in PortType:
             self.log.error('Function parameter is not a PortType value ')
             return
-        if not self._flipper_mirror_is_present('output') and port_type == PortType.OUTPUT_FRONT:
+        if not self._flipper_present['output'] and port_type == PortType.OUTPUT_FRONT:
             self.log.debug('No flipper mirror is present on the input port : PortType.OUTPUT_SIDE value is forbidden ')
             return
-        if not self._flipper_mirror_is_present('input') and port_type == PortType.INPUT_FRONT:
+        if not self._flipper_present['input'] and port_type == PortType.INPUT_FRONT:
             self.log.debug('No flipper mirror is present on the input port : PortType.OUTPUT_SIDE value is forbidden ')
             return
         index = self._get_slit_index(port_type)
-        slit_width = ct.c_float()
-        self._check(self._dll.ShamrockGetAutoSlitWidth(self._device_id, index, ct.byref(slit_width)))
-        return slit_width.value*1e-6
+        status_code, value = self._read_float(self._GetAutoSlitWidth, index)
+        if status_code != OK_CODE:
+            self._check(status_code)
+            return None
+        return value*1e-6
 
     def set_slit_width(self, port_type, value):
         """ Setter for the input slit width in meter
@@ -332,8 +485,7 @@ class Shamrock(Base, GratingSpectrometerInterface):
         if self.SLIT_MIN_WIDTH <= value <= self.SLIT_MAX_WIDTH:
 
             index = self._get_slit_index(port_type)
-            self._dll.ShamrockSetAutoSlitWidth.argtypes = [ct.c_int32, ct.c_int32, ct.c_float]
-            self._check(self._dll.ShamrockSetAutoSlitWidth(self._device_id, index, value*1e6))
+            self._check(self._SetAutoSlitWidth(self._device, index, float(value)*1e6))
         else:
             self.log.error('Slit with ({} um) out of range.'.format(value*1e6))
 
@@ -345,9 +497,9 @@ class Shamrock(Base, GratingSpectrometerInterface):
 
         @return (int): the number of devices detected by the DLL
         """
-        number_of_devices = ct.c_int()
-        self._check(self._dll.ShamrockGetNumberDevices(ct.byref(number_of_devices)))
-        return number_of_devices.value
+        with self._lock:
+            self._check(self._GetNumberDevices(self._int_pointer))  # This function takes no device
+            return self._int_out.value
 
     def _get_connected_devices(self):
         """ Return a list of serial numbers of the connected devices
@@ -375,15 +527,12 @@ class Shamrock(Base, GratingSpectrometerInterface):
 
         @return (int): slit index as defined by Andor shamrock conventions
         """
-        conversion_dict = {PortType.INPUT_FRONT: 2,
-                           PortType.INPUT_SIDE: 1,
-                           PortType.OUTPUT_FRONT: 4,
-                           PortType.OUTPUT_SIDE: 3}
-        return conversion_dict[port_type]
+        return SLIT_INDEX[port_type]
 
     ##############################################################################
     #                 DLL wrappers used by the interface functions
     ##############################################################################
+    @_memoized
     def _get_optical_parameters(self):
         """ Returns the spectrometer optical parameters
 
@@ -392,21 +541,23 @@ class Shamrock(Base, GratingSpectrometerInterface):
         The unit of the given parameters are SI, so meter for the focal_length and radian for the other two
         """
         focal_length, angular_deviation, focal_tilt = ct.c_float(), ct.c_float(), ct.c_float()
-        self._check(self._dll.ShamrockEepromGetOpticalParams(self._device_id, ct.byref(focal_length),
-                                                            ct.byref(angular_deviation), ct.byref(focal_tilt)))
+        self._check(self._EepromGetOpticalParams(self._device, ct.byref(focal_length),
+                                                 ct.byref(angular_deviation), ct.byref(focal_tilt)))
         return {'focal_length': focal_length.value,
                 'angular_deviation': angular_deviation.value*np.pi/180,
                 'focal_tilt': focal_tilt.value*np.pi/180}
 
+    @_memoized
     def _get_number_gratings(self):
         """ Returns the number of gratings in the spectrometer
 
         @return (int): The number of gratings
         """
         number_of_gratings = ct.c_int()
-        self._check(self._dll.ShamrockGetNumberGratings(self._device_id, ct.byref(number_of_gratings)))
+        self._check(self._GetNumberGratings(self._device, ct.byref(number_of_gratings)))
         return number_of_gratings.value
 
+    @_memoized
     def _get_grating_info(self, grating):
         """ Returns the information on a grating
 
@@ -424,13 +575,14 @@ class Shamrock(Base, GratingSpectrometerInterface):
         blaze = ct.create_string_buffer(32)
         home, offset = ct.c_int(), ct.c_int()
 
-        self._check(self._dll.ShamrockGetGratingInfo(self._device_id, grating+1,
-                                                    ct.byref(line), ct.byref(blaze), ct.byref(home), ct.byref(offset)))
+        self._check(self._GetGratingInfo(self._device, grating+1,
+                                         ct.byref(line), blaze, ct.byref(home), ct.byref(offset)))
         return {'ruling': line.value * 1e3,  # DLL use l/mm
                 'blaze': blaze.value,  # todo: check unit directly in nm ?
                 'home': home.value,
                 'offset': offset.value}
 
+    @_memoized
     def _get_wavelength_limit(self, grating):
         """ Returns the wavelength limits of a given grating
 
@@ -440,8 +592,8 @@ class Shamrock(Base, GratingSpectrometerInterface):
         """
         wavelength_min, wavelength_max = ct.c_float(), ct.c_float()
 
-        self._check(self._dll.ShamrockGetWavelengthLimits(self._device_id, grating+1,
-                                                         ct.byref(wavelength_min), ct.byref(wavelength_max)))
+        self._check(self._GetWavelengthLimits(self._device, grating+1,
+                                              ct.byref(wavelength_min), ct.byref(wavelength_max)))
         return wavelength_min.value*1e-9, wavelength_max.value*1e-9  # DLL uses nanometer
 
     def _flipper_mirror_is_present(self, flipper):
@@ -453,26 +605,20 @@ class Shamrock(Base, GratingSpectrometerInterface):
         """
         conversion_dict = {'input': INPUT_CODE, 'output': OUTPUT_CODE}
         code = conversion_dict[flipper]
-        present = ct.c_int()
-        self._check(self._dll.ShamrockFlipperMirrorIsPresent(self._device_id, code, ct.byref(present)))
-        return present.value
+        status_code, value = self._read_int(self._FlipperMirrorIsPresent, code)
+        self._check(status_code)
+        return value
 
-    def _auto_slit_is_present(self, flipper, port):
+    def _auto_slit_is_present(self, port_type):
         """ Return whether the given motorized slit is present or not
 
-        @param (str) flipper: 'input' or 'output'
-        @param (str) port: 'front' or 'side'
+        @param (PortType) port_type: The port to inquire
 
         @return (bool): True if a motorized slit is present
         """
-        conversion_dict = {('input', 'front'): 2,  # todo: Check this, it does not match the rest of code. If there is a discrepency, we should mention it
-                           ('input', 'side'): 1,
-                           ('output', 'front'): 4,
-                           ('output', 'side'): 3}
-        slit_index = conversion_dict[(flipper, port)]
-        present = ct.c_int()
-        self._check(self._dll.ShamrockAutoSlitIsPresent(self._device_id, slit_index, ct.byref(present)))
-        return present.value
+        status_code, value = self._read_int(self._AutoSlitIsPresent, self._get_slit_index(port_type))
+        self._check(status_code)
+        return value
 
     ##############################################################################
     #                    DLL wrapper for calibration functions
@@ -487,13 +633,13 @@ class Shamrock(Base, GratingSpectrometerInterface):
         Shamrock DLL can give a estimate of the calibration if the required parameters are given.
         This feature is not used by Qudi but is useful to check everything is ok.
         """
-        self._check(self._dll.ShamrockSetNumberPixels(self._device_id, value))
+        self._check(self._SetNumberPixels(self._device, int(value)))
 
     def _get_number_of_pixels(self):
         """ Returns the number of pixel previously set with self._set_number_of_pixels """
-        pixel_number = ct.c_int()
-        self._check(self._dll.ShamrockGetNumberPixels(self._device_id, ct.byref(pixel_number)))
-        return pixel_number.value
+        status_code, value = self._read_int(self._GetNumberPixels)
+        self._check(status_code)
+        return value
 
     def _set_pixel_width(self, value):
         """ Internal function to set the pixel width along the dispersion axis
@@ -506,14 +652,29 @@ class Shamrock(Base, GratingSpectrometerInterface):
         if not (1e-6 <= value <= 100e-6):
             self.log.warning('The pixel width you ask ({} um) raises a warning.'.format(value*1e6))
 
-        self._dll.ShamrockSetPixelWidth.argtypes = [ct.c_int32, ct.c_float]
-        self._check(self._dll.ShamrockSetPixelWidth(self._device_id, value*1e6))
+        self._check(self._SetPixelWidth(self._device, float(value)*1e6))
+
+    def _get_calibration(self, number_pixels):
+        """ Returns the wavelength of each pixel (in nanometer) computed by the DLL
+
+        @param (int) number_pixels: The number of pixels previously set with self._set_number_of_pixels
+
+        @return (np.ndarray): A float32 array owned by this module, it is overwritten by the next call
+
+        The DLL writes directly into the array memory. The array and its pointer are only created again when the number
+        of pixels changes. The caller must hold self._lock while it uses the array.
+        """
+        if self._calibration_buffer is None or self._calibration_buffer.size != number_pixels:
+            self._calibration_buffer = np.empty((number_pixels,), dtype=np.float32)
+            self._calibration_pointer = self._calibration_buffer.ctypes.data_as(ct.POINTER(ct.c_float))
+        self._check(self._GetCalibration(self._device, self._calibration_pointer, number_pixels))
+        return self._calibration_buffer
 
     def _get_pixel_width(self):
         """ Returns the pixel width previously set with self._set_pixel_width """
-        pixel_width = ct.c_float()
-        self._check(self._dll.ShamrockGetPixelWidth(self._device_id, ct.byref(pixel_width)))
-        return pixel_width.value*1e-6
+        status_code, value = self._read_float(self._GetPixelWidth)
+        self._check(status_code)
+        return value*1e-6
 
     def _set_detector_offset(self, value):
         """ Sets the detector offset in pixels
@@ -523,13 +684,13 @@ class Shamrock(Base, GratingSpectrometerInterface):
         Shamrock DLL can give a estimate of the calibration if the required parameters are given.
         This feature is not used by Qudi but is useful to check everything is ok.
         """
-        self._check(self._dll.ShamrockSetDetectorOffset(self._device_id, int(value)))
+        self._check(self._SetDetectorOffset(self._device, int(value)))
 
     def _get_detector_offset(self):
         """ Returns the detector offset previously set with self._set_detector_offset """
-        offset = ct.c_int()
-        self._check(self._dll.ShamrockGetDetectorOffset(self._device_id, ct.byref(offset)))
-        return offset.value
+        status_code, value = self._read_int(self._GetDetectorOffset)
+        self._check(status_code)
+        return value
 
     ##############################################################################
     #                    DLL wrapper unused by this module
@@ -541,9 +702,9 @@ class Shamrock(Base, GratingSpectrometerInterface):
 
         #todo: what does this function mean ???
         """
-        present = ct.c_int()
-        self._check(self._dll.ShamrockGratingIsPresent(self._device_id, ct.byref(present)))
-        return present.value
+        status_code, value = self._read_int(self._GratingIsPresent)
+        self._check(status_code)
+        return value
 
     def _get_grating_offset(self, grating):
         """ Returns the grating offset (in motor steps)
@@ -552,9 +713,9 @@ class Shamrock(Base, GratingSpectrometerInterface):
 
         @return (int): grating offset (step)
         """
-        grating_offset = ct.c_int()
-        self._check(self._dll.ShamrockGetGratingOffset(self._device_id, grating+1, ct.byref(grating_offset)))
-        return grating_offset.value
+        status_code, value = self._read_int(self._GetGratingOffset, int(grating)+1)
+        self._check(status_code)
+        return value
 
     def _set_grating_offset(self, grating, value):
         """ Sets the grating offset (in motor step)
@@ -562,4 +723,5 @@ class Shamrock(Base, GratingSpectrometerInterface):
         @param (int) grating : grating index
         @param (int) value: The offset to set
         """
-        self._check(self._dll.ShamrockSetGratingOffset(self._device_id, grating+1, value))
+        self._check(self._SetGratingOffset(self._device, int(grating)+1, int(value)))
+        self._memo.pop(('_get_grating_info', (int(grating),)), None)  # Only the information of this grating has changed
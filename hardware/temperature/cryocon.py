@@ -23,15 +23,60 @@ Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
 top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
 """
 
+import re
 import time
 import visa
+from qtpy import QtCore
 from core.module import Base
 from core.configoption import ConfigOption
+from core.util.mutex import Mutex
 import numpy as np
 
 from interface.process_interface import ProcessInterface
 from interface.pid_controller_interface import PIDControllerInterface
 
+# Number at the beginning of a reply, followed by an optional unit like in '295.00K' or '0.00%'
+_VALUE_PATTERN = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+
+
+def _parse_value(reply):
+    """ Return the number at the beginning of a reply of the device
+
+    @param (str) reply: The reply, with or without unit
+
+    @return (float): The value, the unit is ignored
+    """
+    return float(_VALUE_PATTERN.match(reply).group(1))
+
+
+class TemperaturePoller(QtCore.QObject):
+    """ Helper class reading the temperatures periodically in a separate thread. """
+
+    def __init__(self, hardware):
+        super().__init__()
+        self._hardware = hardware
+        self._timer = None
+
+    @QtCore.Slot()
+    def start(self):
+        """ Start the polling timer in the thread of this object. """
+        self._timer = QtCore.QTimer()
+        self._timer.timeout.connect(self._poll)
+        self._timer.start(int(self._hardware._poll_interval * 1000))
+        self._poll()
+
+    @QtCore.Slot()
+    def stop(self):
+        """ Stop the polling timer. """
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer.timeout.disconnect()
+            self._timer = None
+
+    def _poll(self):
+        """ Read all the channels in one query and publish them by replacing the whole dictionary. """
+        self._hardware._polled_temperatures = self._hardware.get_temperatures(self._hardware._polled_channels)
+
 
 class Cryocon(Base, ProcessInterface, PIDControllerInterface):
     """ Main class for the Cryo-Con hardware
@@ -48,6 +93,9 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
         module.Class: 'temperature.cryocon.Cryocon'
         ip_address: '192.168.1.222'
         main_channel: 'B'
+        cache_ttl: 0.5
+        poll_interval: 0  # in seconds, read the temperatures in a background thread if not 0
+        polled_channels: ['A', 'B']  # Optional, only the main channel is polled by default
 
     """
 
@@ -55,31 +103,73 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
     _ip_port = ConfigOption('port', 5000)
     _timeout = ConfigOption('timeout', 5)
     _main_channel = ConfigOption('main_channel', 'A')
+    _cache_ttl = ConfigOption('cache_ttl', 0.5)  # Time in second during which a measured temperature is reused
+    _poll_interval = ConfigOption('poll_interval', 0)
+    _polled_channels = ConfigOption('polled_channels', None)  # Channels read by the poller, main channel by default
+
+    _sig_stop_polling = QtCore.Signal()
+
+    # Setpoint command of each loop, only the temperature is interpolated when it is sent
+    _setpoint_commands = {1: 'loop 1:setp %s', 2: 'loop 2:setp %s'}
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self._inst = None
         self._stop_wait = False
+        self._temperature_cache = dict()
+        self._polled_temperatures = dict()
+        self._lock = Mutex()
+        self._poller_thread = None
+        self._poller = None
 
     def on_activate(self):
         """ Initialisation performed during activation of the module.
         """
         self.open_resource()
+        if self._polled_channels is None:
+            self._polled_channels = (self._main_channel,)
+        if self._poll_interval > 0:
+            self._poller_thread = QtCore.QThread()
+            self._poller = TemperaturePoller(self)
+            self._poller.moveToThread(self._poller_thread)
+            self._poller_thread.started.connect(self._poller.start)
+            self._sig_stop_polling.connect(self._poller.stop, QtCore.Qt.BlockingQueuedConnection)
+            self._poller_thread.start()
 
     def open_resource(self):
         """ Open a new visa connection """
         rm = visa.ResourceManager()
         try:
             address = 'TCPIP::{}::{}::SOCKET'.format(self._ip_address, self._ip_port)
-            self._inst = rm.open_resource(address, timeout=self._timeout*1000,
-                                          write_termination='\n', read_termination='\n')
+            # The connection attempt is bounded by the same timeout as the reads, so a disconnected device can not
+            # block the calling thread for the whole system TCP connect timeout
+            self._inst = rm.open_resource(address, timeout=self._timeout*1000, open_timeout=self._timeout*1000,
+                                          write_termination='\n', read_termination='\r\n')
         except visa.VisaIOError:
             self.log.error('Could not connect to hardware. Please check the wires and the address.')
-            raise visa.VisaIOError
+            raise
+        try:
+            # Commands are a few bytes long, send them without waiting for Nagle's algorithm to coalesce them
+            self._inst.set_visa_attribute(visa.constants.VI_ATTR_TCPIP_NODELAY, visa.constants.VI_TRUE)
+        except visa.VisaIOError:
+            self.log.debug('Could not disable the Nagle algorithm on the Cryocon connexion.')
+        try:
+            # The connexion is kept open for the module lifetime, let the system detect a silently dropped link
+            self._inst.set_visa_attribute(visa.constants.VI_ATTR_TCPIP_KEEPALIVE, visa.constants.VI_TRUE)
+        except visa.VisaIOError:
+            self.log.debug('Could not enable the keepalive on the Cryocon connexion.')
 
     def on_deactivate(self):
         """ Deinitialisation performed during deactivation of the module.
         """
+        if self._poller_thread is not None:
+            self._sig_stop_polling.emit()
+            self._sig_stop_polling.disconnect()
+            self._poller_thread.quit()
+            self._poller_thread.wait()
+            self._poller_thread = None
+            self._poller = None
+            self._polled_temperatures = dict()
         try:
             self._inst.close()
         except visa.VisaIOError:
@@ -106,37 +196,95 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
     def get_temperature(self, channel=None):
         """ Cryocon function to get one temperature """
         channel = channel if channel is not None else self._main_channel
+        polled_temperatures = self._polled_temperatures
+        if channel in polled_temperatures:
+            return polled_temperatures[channel]
+        now = time.monotonic()
+        last_time, temperature = self._temperature_cache.get(channel, (None, None))
+        if last_time is not None and now - last_time < self._cache_ttl:
+            return temperature
         try:
             text = 'INPUT? {}'.format(channel)
             temperature = float(self._query(text))
         except:
             temperature = np.NaN
+        self._temperature_cache[channel] = (now, temperature)
         return temperature
 
+    def get_temperatures(self, channels=('A', 'B')):
+        """ Cryocon function to get the temperature of multiple channels in a single query
+
+        @param (tuple) channels: The channels to read
+
+        @return (dict): The temperatures with the channels as keys
+
+        The queries are sent as one compound command, the device answers with the values separated by semicolons.
+        Each value is parsed separately, so a missing sensor (answered as '.......') only gives NaN for its channel.
+        """
+        try:
+            replies = self._query_many(*('INPUT? {}'.format(channel) for channel in channels))
+        except:
+            return {channel: np.NaN for channel in channels}
+        temperatures = dict()
+        for channel, reply in zip(channels, replies):
+            try:
+                temperatures[channel] = _parse_value(reply)
+            except (AttributeError, ValueError):
+                temperatures[channel] = np.NaN
+        return temperatures
+
+    def _query_many(self, *questions):
+        """ Helper function to send multiple queries in one message and split the answers
+
+        @param (str) questions: The queries to send, they are joined in one compound command
+
+        @return (list): The replies in the order of the queries
+        """
+        replies = self._query(';'.join(questions)).split(';')
+        if len(replies) != len(questions):
+            raise ValueError('Cryocon returned {} replies to {} queries'.format(len(replies), len(questions)))
+        return replies
+
     def _query(self, text):
         """ Helper function to send query and deal with errors """
-        try:
-            response = self._inst.query(text)
-        except visa.VisaIOError:
-            if self.module_state() != 'idle':
-                return None
-            self.log.warning('Cryocon connexion lost, automatic attempt to reconnect...')
-            self.open_resource()
-            self._inst.query(text)
+        with self._lock:
+            try:
+                response = self._inst.query(text)
+            except visa.VisaIOError:
+                if self.module_state() != 'idle':
+                    return None
+                self.log.warning('Cryocon connexion lost, automatic attempt to reconnect...')
+                self.open_resource()
+                response = self._inst.query(text)
         return response
 
+    def _write(self, *commands):
+        """ Helper function to send one or multiple commands in a single message and deal with errors
+
+        @param (str) commands: The commands to send, they are joined in one compound command
+        """
+        message = ';'.join(commands).encode() + b'\n'
+        with self._lock:
+            try:
+                self._inst.write_raw(message)
+            except visa.VisaIOError:
+                if self.module_state() != 'idle':
+                    return
+                self.log.warning('Cryocon connexion lost, automatic attempt to reconnect...')
+                self.open_resource()
+                self._inst.write_raw(message)
+
     def set_temperature(self, temperature, channel=None, turn_on=False):
         """ Function to set the temperature setpoint """
         channel = channel if channel is not None else self._main_channel
         loop = 1 if channel == 'A' else 2
-        text = 'loop {}:setp {}'.format(loop, temperature)
+        commands = [self._setpoint_commands[loop] % temperature]
+        if turn_on:
+            commands.append('control')
         try:
-            self._query(text)
+            self._write(*commands)
         except:
             self.log.error('Cryocon temperature could not be set because of a connexion error.')
-            return
-        if turn_on:
-            self.control()
 
     def get_setpoint_temperature(self, channel=None):
         """ Return the main channel set point temperature"""
@@ -144,18 +292,18 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
         loop = 1 if channel == 'A' else 2
         try:
             text = 'loop {}:setp?'.format(loop)
-            setpoint = float(self._query(text)[:-2])
+            setpoint = _parse_value(self._query(text))  # '295.00K'
         except:
             setpoint = np.NaN
         return setpoint
 
     def stop(self):
         """  Function to stop the heating of the Cryocon """""
-        self._query('stop')
+        self._write('stop')
 
     def control(self):
         """ Function to turn the heating on """
-        self._query('control')
+        self._write('control')
 
     # ProcessInterface methods
 
@@ -180,7 +328,7 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
         loop = 1 if channel == 'A' else 2
         try:
             text = 'loop {}:pgain?'.format(loop)
-            value = float(self._query(text)[:-1])
+            value = _parse_value(self._query(text))
         except:
             value = np.NaN
         return value
@@ -201,7 +349,7 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
         loop = 1 if channel == 'A' else 2
         try:
             text = 'loop {}:igain?'.format(loop)
-            value = float(self._query(text)[:-1])
+            value = _parse_value(self._query(text))
         except:
             value = np.NaN
         return value
@@ -222,7 +370,7 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
         loop = 1 if channel == 'A' else 2
         try:
             text = 'loop {}:dgain?'.format(loop)
-            value = float(self._query(text)[:-1])
+            value = _parse_value(self._query(text))
         except:
             value = np.NaN
         return value
@@ -267,7 +415,7 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
 
         @return (bool): True if enabled, False otherwise
         """
-        return self._query('control?')[:-2] == 'ON'  # 'ON \r'
+        return self._query('control?').strip() == 'ON'  # 'ON '
 
     def set_enabled(self, enabled):
         """ Set if the PID is enabled (True) or if it is disabled (False) and the manual value is used
@@ -304,7 +452,7 @@ class Cryocon(Base, ProcessInterface, PIDControllerInterface):
         loop = 1 if channel == 'A' else 2
         try:
             text = 'loop {}:htrread?'.format(loop)
-            value = float(self._query(text)[:-2])  # '0.00%\r'
+            value = _parse_value(self._query(text))  # '0.00%'
         except:
             value = np.NaN
         max_power = 50 if loop == 1 else 25  # Cryocon loop 1 max range is 50 W, loop 2 is  25 W
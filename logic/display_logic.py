@@ -19,6 +19,9 @@ Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
 top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
 """
 
+import math
+
+from core.configoption import ConfigOption
 from logic.generic_logic import GenericLogic
 from collections import OrderedDict
 from qtpy import QtCore
@@ -29,10 +32,16 @@ class DisplayLogic(GenericLogic):
 
     displaylogic:
         module.Class: 'display_logic.DisplayLogic'
+        refreshing_time: 1000
         connect:
             process_1: 'processdummy'
     """
 
+    _refreshing_time = ConfigOption('refreshing_time', 1000)
+
+    # Emitted with (label, value, unit) when a process value has changed
+    sigValueChanged = QtCore.Signal(str, float, str)
+
     def __init__(self, config, **kwargs):
         """ Create logic object
 
@@ -56,8 +65,37 @@ class DisplayLogic(GenericLogic):
             hwname = self.get_connector(connector)._name
             self.display[hwname] = self.get_connector(connector)
 
+        # The units do not change while the hardware is active, they are read only once
+        self._processes = [(label, hardware, hardware.get_process_unit()[0])
+                           for label, hardware in self.display.items()]
+        self._last_values = dict()
+        self._timer = QtCore.QTimer()
+        self._timer.setSingleShot(False)
+        self._timer.timeout.connect(self._update_values)
+        self._timer.start(self._refreshing_time)
+
     def on_deactivate(self):
         """ Deactivate modeule.
         """
+        self._timer.stop()
+        self._timer.timeout.disconnect()
         self.display = dict()
 
+    def _update_values(self):
+        """ Read the process values and emit the ones that changed since the last reading.
+        """
+        last_values = self._last_values
+        for label, hardware, unit in self._processes:
+            value = hardware.get_process_value()
+            last_value = last_values.get(label)
+            # NaN is not equal to itself, a disconnected process would be emitted again at each refresh
+            if value == last_value or (last_value is not None and math.isnan(value) and math.isnan(last_value)):
+                continue
+            last_values[label] = value
+            self.sigValueChanged.emit(label, value, unit)
+
+    def request_values(self):
+        """ Have all the process values emitted at the next refresh, even the ones that did not change.
+        """
+        self._last_values = dict()
+
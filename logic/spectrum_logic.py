@@ -63,6 +63,7 @@ class SpectrumLogic(GenericLogic):
 
     # declare status variables (logic attribute) :
     _reverse_data_with_side_output = ConfigOption('reverse_data_with_side_output', False)
+    _status_poll_interval = ConfigOption('status_poll_interval', 0.01)  # Time between camera status checks (s)
 
     # declare status variables (logic attribute) :
     _acquired_data = StatusVar('wavelength_calibration', np.empty((2, 0)))
@@ -82,7 +83,15 @@ class SpectrumLogic(GenericLogic):
     _coeff_rej_cosmic = StatusVar('coeff_cosmic_rejection', 2.2)
 
     _sigStart = QtCore.Signal()
-    _sigCheckStatus = QtCore.Signal()
+
+    # Emitted with the acquired data each time an acquisition is finished or stopped
+    sigSpectrumReady = QtCore.Signal(object)
+    # Emitted once apply_settings has finished, with False if a setting could not be applied
+    sigSettingsApplied = QtCore.Signal(bool)
+
+    # Order in which apply_settings sets the spectrometer parameters
+    _settings_order = ('grating_index', 'center_wavelength', 'input_port', 'input_slit_width', 'output_port',
+                       'output_slit_width')
     ##############################################################################
     #                            Basic functions
     ##############################################################################
@@ -115,12 +124,17 @@ class SpectrumLogic(GenericLogic):
         self._shutter_state = None
         self._loop_counter = None
         self._loop_timer = None
+        self._status_timer = None
+        self._wavelength_spectrum = None
 
     def on_activate(self):
         """ Initialisation performed during activation of the module. """
+        # The connected modules are resolved once for all the following hardware calls
+        spectrometer = self.spectrometer()
+        camera = self.camera()
 
-        self.spectro_constraints = self.spectrometer().get_constraints()
-        self.camera_constraints = self.camera().get_constraints()
+        self.spectro_constraints = spectrometer.get_constraints()
+        self.camera_constraints = camera.get_constraints()
 
         ports = self.spectro_constraints.ports
         self._output_ports = [port for port in ports if port.type == PortType.OUTPUT_SIDE or
@@ -129,36 +143,37 @@ class SpectrumLogic(GenericLogic):
                              port.type == PortType.INPUT_FRONT]
 
         # Get current physical state
-        self._grating_index = self.spectrometer().get_grating_index()
-        self._center_wavelength = self.spectrometer().get_wavelength()
-        self._input_port = self.spectrometer().get_input_port()
-        self._output_port = self.spectrometer().get_output_port()
-        self._input_slit_width = [self.spectrometer().get_slit_width(port.type) if port.is_motorized else None
+        self._grating_index = spectrometer.get_grating_index()
+        self._center_wavelength = spectrometer.get_wavelength()
+        self._wavelength_spectrum = None
+        self._input_port = spectrometer.get_input_port()
+        self._output_port = spectrometer.get_output_port()
+        self._input_slit_width = [spectrometer.get_slit_width(port.type) if port.is_motorized else None
                                   for port in self._input_ports]
-        self._output_slit_width = [self.spectrometer().get_slit_width(port.type) if port.is_motorized else None
+        self._output_slit_width = [spectrometer.get_slit_width(port.type) if port.is_motorized else None
                                    for port in self._output_ports]
 
         # Get camera state
-        self._read_mode = self.camera().get_read_mode()
-        self._trigger_mode = self.camera().get_trigger_mode()
+        self._read_mode = camera.get_read_mode()
+        self._trigger_mode = camera.get_trigger_mode()
 
         # Try status variable value or take current hardware value if status variable is None
-        self.readout_speed = self._readout_speed or self.camera().get_readout_speed()
-        self.camera_gain = self._camera_gain or self.camera().get_gain()
-        self.exposure_time = self._exposure_time or self.camera().get_exposure_time()
+        self.readout_speed = self._readout_speed or camera.get_readout_speed()
+        self.camera_gain = self._camera_gain or camera.get_gain()
+        self.exposure_time = self._exposure_time or camera.get_exposure_time()
 
         self.fit_spectrometer_dispersion()
 
         if self.camera_constraints.has_cooler:
-            self.temperature_setpoint = self._temperature_setpoint or self.camera().get_temperature_setpoint()
+            self.temperature_setpoint = self._temperature_setpoint or camera.get_temperature_setpoint()
 
-        self._image_advanced = self.camera().get_image_advanced_parameters()
+        self._image_advanced = camera.get_image_advanced_parameters()
 
         if self._active_tracks == None:
-            self._active_tracks = self.camera().get_active_tracks()
+            self._active_tracks = camera.get_active_tracks()
 
         if self.camera_constraints.has_shutter:
-            self._shutter_state = self.camera().get_shutter_state()
+            self._shutter_state = camera.get_shutter_state()
 
         # QTimer for asynchronous execution :
         self._loop_counter = 0
@@ -166,10 +181,14 @@ class SpectrumLogic(GenericLogic):
         self._acquisition_params = OrderedDict()
 
         self._sigStart.connect(self._start_acquisition)
-        self._sigCheckStatus.connect(self._check_status, QtCore.Qt.QueuedConnection)
         self._loop_timer = QtCore.QTimer()
         self._loop_timer.setSingleShot(True)
         self._loop_timer.timeout.connect(self._acquisition_loop)
+        # The camera status is polled at a fixed rate while acquiring, instead of as fast as the event loop allows
+        self._status_timer = QtCore.QTimer()
+        self._status_timer.setSingleShot(True)
+        self._status_timer.setInterval(int(self._status_poll_interval*1000))
+        self._status_timer.timeout.connect(self._check_status)
 
     def on_deactivate(self):
         """ Deinitialisation performed during deactivation of the module. """
@@ -177,8 +196,9 @@ class SpectrumLogic(GenericLogic):
             self.stop_acquisition()
             self.log.warning('Stopping running acquisition du to module deactivation.')
 
+        self._status_timer.stop()
+        self._status_timer.timeout.disconnect()
         self._sigStart.disconnect()
-        self._sigCheckStatus.disconnect()
 
     ##############################################################################
     #                            Acquisition functions
@@ -226,20 +246,21 @@ class SpectrumLogic(GenericLogic):
         """
         self._loop_counter -= 1
         self.camera().start_acquisition()
-        self._sigCheckStatus.emit()
+        self._status_timer.start()
 
     def _check_status(self):
-        """ Method / Slot used by the acquisition call by Qtimer signal to check if the acquisition is complete """
+        """ Method / Slot called by the status QTimer to check if the acquisition is complete """
         # If module unlocked by stop_acquisition
         if self.module_state() != 'locked':
             self._acquired_data = self.get_acquired_data()
             #self._update_acquisition_params()
+            self.sigSpectrumReady.emit(self._acquired_data)
             self.log.debug("Acquisition stopped. Status loop stopped.")
             return
 
         # If hardware still running
         if not self.get_ready_state():
-            self._sigCheckStatus.emit()
+            self._status_timer.start()
             return
 
         # Acquisition is finished
@@ -247,12 +268,14 @@ class SpectrumLogic(GenericLogic):
             self._acquired_data = self.get_acquired_data()
             #self._update_acquisition_params()
             self.module_state.unlock()
+            self.sigSpectrumReady.emit(self._acquired_data)
             self.log.debug("Acquisition finished : module state is 'idle' ")
             return
 
         elif self._acquisition_mode == 'LIVE_SCAN':
             self._loop_counter += 1
             self._acquired_data = self.get_acquired_data()
+            self.sigSpectrumReady.emit(self._acquired_data)
             self._acquisition()
             return
 
@@ -262,6 +285,7 @@ class SpectrumLogic(GenericLogic):
             if self._loop_counter <= 0:
                 #self._update_acquisition_params()
                 self.module_state.unlock()
+                self.sigSpectrumReady.emit(self._acquired_data)
                 self.log.debug("Acquisition finished : module state is 'idle' ")
             else:
                 self._loop_timer.start(self.scan_delay*1000)
@@ -335,6 +359,30 @@ class SpectrumLogic(GenericLogic):
     # All functions defined in this part should be used to
     #
     #
+    def apply_settings(self, settings):
+        """ Set multiple spectrometer parameters in one call.
+
+        @param (dict) settings: new values with the property names as keys (ex: {'center_wavelength': 600e-9})
+
+        The parameters are applied in a fixed order, the grating being set before the center wavelength as the
+        wavelength range depends on the grating. sigSettingsApplied is emitted once they are all applied, or as soon as
+        one of them fails.
+        """
+        unknown_keys = set(settings) - set(self._settings_order)
+        if unknown_keys:
+            self.log.error('Unknown spectrometer settings : {}'.format(', '.join(sorted(unknown_keys))))
+            self.sigSettingsApplied.emit(False)
+            return
+        try:
+            for key in self._settings_order:
+                if key in settings:
+                    setattr(self, key, settings[key])
+        except Exception:
+            self.log.exception('Spectrometer settings could not be applied.')
+            self.sigSettingsApplied.emit(False)
+            return
+        self.sigSettingsApplied.emit(True)
+
     ##############################################################################
     #                            Gratings functions
     ##############################################################################
@@ -367,6 +415,7 @@ class SpectrumLogic(GenericLogic):
             return
         self.spectrometer().set_grating_index(grating_index)
         self._grating_index = self.spectrometer().get_grating_index()
+        self._wavelength_spectrum = None
 
     ##############################################################################
     #                            Wavelength functions
@@ -402,13 +451,22 @@ class SpectrumLogic(GenericLogic):
             wavelength = float(wavelength - self._wavelength_calibration)
         else:
             wavelength = float(wavelength)
-        wavelength_max = self.spectro_constraints.gratings[self._grating_index].wavelength_max
+        wavelength_max = self.wavelength_limits[1]
         if not 0 <= wavelength < wavelength_max:
             self.log.error('Wavelength parameter is not correct : it must be in range {} to {} '
                            .format(0, wavelength_max))
             return
         self.spectrometer().set_wavelength(wavelength)
         self._center_wavelength = self.spectrometer().get_wavelength()
+        self._wavelength_spectrum = None
+
+    @property
+    def wavelength_limits(self):
+        """ Getter method returning the wavelength limits of the active grating.
+
+        @return (tuple): (wavelength_min, wavelength_max) of the active grating (meter)
+        """
+        return 0, self.spectro_constraints.gratings[self._grating_index].wavelength_max
 
     def _fitting_correction(self, lam_c, pixels, a, b, c, d, e):
         """ Function both used by the fitting function and the wavelength spectrum. This polynomial function
@@ -479,15 +537,20 @@ class SpectrumLogic(GenericLogic):
 
         @return: (ndarray) measured wavelength array
 
+        The array only depends on the grating, the center wavelength and the calibration : it is computed again only
+        when one of them is changed and is read-only for the caller.
+
         Tested : yes (need to
         SI check : yes
         """
-        image_width = self.camera_constraints.width
-        pixel_width = self.camera_constraints.pixel_size_width
-        pixels_vector = np.arange(-image_width // 2, image_width // 2 - image_width % 2) * pixel_width
-        fitting_correction = self._fitting_correction(self.center_wavelength, pixels_vector, *self._dispersion_fitting_parameters)
-        #return self._analytic_dispersion() + fitting_correction
-        return self.spectrometer().get_spectrometer_dispersion(image_width, pixel_width) + self.wavelength_calibration
+        if self._wavelength_spectrum is None:
+            image_width = self.camera_constraints.width
+            pixel_width = self.camera_constraints.pixel_size_width
+            wavelength_spectrum = self.spectrometer().get_spectrometer_dispersion(image_width, pixel_width) \
+                + self.wavelength_calibration
+            wavelength_spectrum.setflags(write=False)
+            self._wavelength_spectrum = wavelength_spectrum
+        return self._wavelength_spectrum
 
     @property
     def wavelength_calibration(self):
@@ -510,6 +573,7 @@ class SpectrumLogic(GenericLogic):
                            " until the acquisition is completely stopped ")
             return
         self._wavelength_calibration = wavelength_calibration
+        self._wavelength_spectrum = None
 
 
     ##############################################################################